@@ -0,0 +1,295 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+import asyncpg
+import httpx
+
+import app as webapp
+import migrations
+
+# Table sizes seeded by default, one benchmark run per size
+DEFAULT_ROW_COUNTS = [10_000, 100_000, 1_000_000]
+# Rows generated and copied into associates_info per batch while seeding
+SEED_BATCH_SIZE = 50_000
+# Existing rows sampled after seeding to build lookup, edit and delete requests
+SAMPLE_SIZE = 2000
+
+FIRST_NAMES = ['James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda', 'David', 'Elizabeth',
+               'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Charles', 'Karen',
+               'Daniel', 'Nancy', 'Matthew', 'Lisa', 'Anthony', 'Betty', 'Mark', 'Sandra', 'Donald', 'Ashley']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+              'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin',
+              'Lee', 'Perez', 'Thompson', 'White', 'Harris', 'Sanchez', 'Clark', 'Ramirez', 'Lewis', 'Robinson']
+DEPARTMENTS = ['Engineering', 'Sales', 'Marketing', 'Finance', 'Human Resources', 'Operations', 'Legal', 'Support',
+               'Research', 'Facilities', 'Procurement', 'Security']
+FIRST_HIRE_DATE = date(2000, 1, 1)
+HIRE_DATE_SPAN_DAYS = 365 * 25
+
+# Rows on the page rendered by the render scenario, the size of a default
+# /associates page, and how many times each page is rendered
+RENDER_PAGE_ROWS = 100
+RENDER_ITERATIONS = 2000
+
+# Associates fetched per request by the api:ids scenario
+API_IDS_PER_REQUEST = 100
+
+# Weights of the operations in the mixed read/write scenario
+MIXED_WEIGHTS = {'associates': 50, 'lookup': 25, 'insert': 10, 'edit': 10, 'delete': 5}
+
+# Generate one synthetic associate; managers are drawn from a pool about a
+# twentieth of the table size so manager lookups match several rows
+def generate_associate(rng, row_count):
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    manager_number = rng.randrange(max(row_count // 20, 1))
+    manager = f"{FIRST_NAMES[manager_number % len(FIRST_NAMES)]} {LAST_NAMES[manager_number // len(FIRST_NAMES) % len(LAST_NAMES)]} {manager_number}"
+    hire_date = FIRST_HIRE_DATE + timedelta(days=rng.randrange(HIRE_DATE_SPAN_DAYS))
+    return name, hire_date, manager, rng.choice(DEPARTMENTS)
+
+# Replace the contents of associates_info with row_count generated rows. The
+# same seed always produces the same table.
+async def seed_associates(conn, row_count, seed):
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    await conn.execute("TRUNCATE associates_info RESTART IDENTITY")
+    for offset in range(0, row_count, SEED_BATCH_SIZE):
+        batch = [generate_associate(rng, row_count) for _ in range(min(SEED_BATCH_SIZE, row_count - offset))]
+        await conn.copy_records_to_table('associates_info', records=batch, columns=['name', 'hire_date', 'manager', 'department'])
+    await conn.execute("ANALYZE associates_info")
+    print(f"Seeded {row_count} rows in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+async def sample_associates(conn, seed):
+    await conn.execute("SELECT setseed($1)", (seed % 1000) / 1000)
+    return await conn.fetch("SELECT id, name, hire_date, manager, department FROM associates_info ORDER BY random() LIMIT $1", SAMPLE_SIZE)
+
+# Nearest-rank percentile of an already sorted list
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    rank = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+def summarize(latencies, errors, elapsed):
+    latencies.sort()
+    milliseconds = lambda value: round(value * 1000, 3) if value is not None else None
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'mean_ms': milliseconds(sum(latencies) / len(latencies)) if latencies else None,
+        'p50_ms': milliseconds(percentile(latencies, 0.50)),
+        'p95_ms': milliseconds(percentile(latencies, 0.95)),
+        'p99_ms': milliseconds(percentile(latencies, 0.99)),
+        'max_ms': milliseconds(latencies[-1]) if latencies else None
+    }
+
+# Request builders; each returns (method, url, form data or None)
+def associates_request(rng, context):
+    params = {}
+    if rng.random() < 0.5:
+        params['after_id'] = rng.randrange(context['max_id'] + 1)
+    if rng.random() < 0.25:
+        params['department'] = rng.choice(DEPARTMENTS)
+    query = "&".join(f"{key}={value}" for key, value in params.items())
+    return 'GET', f"/associates?{query}" if query else "/associates", None
+
+def lookup_request(fields):
+    def build(rng, context):
+        associate = rng.choice(context['sample'])
+        data = {}
+        for field in fields:
+            if field == 'id':
+                data['id'] = str(associate['id'])
+            elif field == 'name':
+                # Search on the last name, as a person would type it
+                data['name'] = associate['name'].split()[-1]
+            else:
+                data[field] = associate[field]
+        return 'POST', "/lookup_associate", data
+    return build
+
+def insert_request(rng, context):
+    name, hire_date, manager, department = generate_associate(rng, context['row_count'])
+    return 'POST', "/associates", {'name': name, 'hire_date': hire_date.isoformat(), 'manager': manager, 'department': department}
+
+def edit_request(rng, context):
+    associate = rng.choice(context['sample'])
+    return 'POST', "/edit_associate", {'id': str(associate['id']), 'department': rng.choice(DEPARTMENTS)}
+
+# Each sampled id is deleted at most once so deletes never miss
+def delete_request(rng, context):
+    if not context['deletable']:
+        return edit_request(rng, context)
+    return 'POST', "/delete_associate", {'id': str(context['deletable'].pop())}
+
+def api_list_request(rng, context):
+    return 'GET', f"/api/associates?after_id={rng.randrange(context['max_id'] + 1)}", None
+
+# Fetch API_IDS_PER_REQUEST sampled associates in one request
+def api_ids_request(rng, context):
+    ids = ",".join(str(associate['id']) for associate in rng.sample(context['sample'], API_IDS_PER_REQUEST))
+    return 'GET', f"/api/associates?ids={ids}", None
+
+def mixed_request(rng, context):
+    operation = rng.choices(list(MIXED_WEIGHTS), weights=list(MIXED_WEIGHTS.values()))[0]
+    if operation == 'lookup':
+        return lookup_request(rng.choice(webapp.field_combinations(webapp.LOOKUP_FIELDS)))(rng, context)
+    return {'associates': associates_request, 'insert': insert_request, 'edit': edit_request, 'delete': delete_request}[operation](rng, context)
+
+# Time the HTML rendering of each page type in process, without the database
+# or HTTP in the way. Runs once, since it does not depend on the table size.
+def benchmark_rendering(seed):
+    rng = random.Random(seed)
+    associates = []
+    for id in range(1, RENDER_PAGE_ROWS + 1):
+        name, hire_date, manager, department = generate_associate(rng, RENDER_PAGE_ROWS)
+        associates.append({'id': id, 'name': name, 'hire_date': hire_date, 'manager': manager, 'department': department})
+    associates.sort(key=lambda associate: (associate['department'], associate['id']))
+    stats = {
+        'total': len(associates),
+        'departments': [{'department': department, 'headcount': 1} for department in DEPARTMENTS],
+        'hires_by_month': [{'month': f"{year}-{month:02d}", 'hires': 1} for year in range(2000, 2025) for month in range(1, 13)]
+    }
+    pages = {
+        'associates_page': lambda: webapp.render_associates_page(associates, 1, RENDER_PAGE_ROWS, False, True, RENDER_PAGE_ROWS, None, 1),
+        'lookup_page': lambda: webapp.render_lookup_page(associates[:webapp.LOOKUP_RESULT_LIMIT]),
+        'stats_page': lambda: webapp.render_stats_page(stats)
+    }
+
+    results = {}
+    for name, render in pages.items():
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(RENDER_ITERATIONS):
+            render_started = time.perf_counter()
+            render()
+            latencies.append(time.perf_counter() - render_started)
+        results[name] = summarize(latencies, 0, time.perf_counter() - started)
+        results[name]['bytes'] = len(render())
+        print(f"render, {name}: {results[name]}", file=sys.stderr)
+    return results
+
+def build_scenarios():
+    scenarios = {'associates': associates_request}
+    for fields in webapp.field_combinations(webapp.LOOKUP_FIELDS):
+        scenarios['lookup:' + "+".join(fields)] = lookup_request(fields)
+    scenarios['api:list'] = api_list_request
+    scenarios['api:ids'] = api_ids_request
+    scenarios['mixed'] = mixed_request
+    return scenarios
+
+# Send requests from `concurrency` workers until `requests` have completed.
+# Redirects are not followed, so a write is timed without the page it
+# redirects to; responses with a 4xx/5xx status count as errors.
+async def run_scenario(client, build_request, context, requests, concurrency, seed):
+    rng = random.Random(seed)
+    latencies = []
+    errors = 0
+    remaining = itertools.count()
+
+    async def worker():
+        nonlocal errors
+        while next(remaining) < requests:
+            method, url, data = build_request(rng, context)
+            started = time.perf_counter()
+            response = await client.request(method, url, data=data)
+            await response.aread()
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+def make_client(base_url):
+    if base_url:
+        return httpx.AsyncClient(base_url=base_url, timeout=None)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=webapp.app), base_url="http://benchmark", timeout=None)
+
+def current_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+async def benchmark_size(args, row_count, scenarios):
+    conn = await asyncpg.connect(webapp.DATABASE_URL)
+    try:
+        if not args.skip_seed:
+            await seed_associates(conn, row_count, args.seed)
+        row_count = await conn.fetchval("SELECT count(*) FROM associates_info")
+        sample = await sample_associates(conn, args.seed)
+        max_id = await conn.fetchval("SELECT coalesce(max(id), 0) FROM associates_info")
+    finally:
+        await conn.close()
+
+    context = {'row_count': row_count, 'max_id': max_id, 'sample': sample,
+               'deletable': [associate['id'] for associate in sample[len(sample) // 2:]]}
+    results = {}
+    async with make_client(args.base_url) as client:
+        for number, (name, build_request) in enumerate(scenarios.items()):
+            if args.warmup:
+                await run_scenario(client, build_request, context, args.warmup, args.concurrency, args.seed + number)
+            results[name] = await run_scenario(client, build_request, context, args.requests, args.concurrency, args.seed + number)
+            print(f"{row_count} rows, {name}: {results[name]}", file=sys.stderr)
+    return {'rows': row_count, 'scenarios': results}
+
+async def main(args):
+    scenarios = build_scenarios()
+    if args.scenarios:
+        scenarios = {name: build_request for name, build_request in scenarios.items()
+                     if any(name == wanted or name.startswith(wanted + ":") for wanted in args.scenarios)}
+
+    report = {
+        'commit': current_commit(),
+        'transport': args.base_url or 'asgi',
+        'concurrency': args.concurrency,
+        'requests_per_scenario': args.requests,
+        'seed': args.seed,
+        'runs': []
+    }
+    if not args.scenarios or 'render' in args.scenarios:
+        report['render'] = benchmark_rendering(args.seed)
+
+    if scenarios and args.base_url:
+        for row_count in args.rows:
+            report['runs'].append(await benchmark_size(args, row_count, scenarios))
+    elif scenarios:
+        # Run the app in process, on a schema brought up to date first
+        await migrations.migrate_database(webapp.DATABASE_URL)
+        async with webapp.app.router.lifespan_context(webapp.app):
+            for row_count in args.rows:
+                report['runs'].append(await benchmark_size(args, row_count, scenarios))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + "\n")
+    print(output)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Seed associates_info and load-test the FastAPI endpoints. "
+                                                 "WARNING: seeding truncates associates_info in DATABASE_URL.")
+    parser.add_argument('--rows', type=lambda value: [int(count) for count in value.split(",")], default=DEFAULT_ROW_COUNTS,
+                        help="comma-separated table sizes to seed and benchmark (default: 10000,100000,1000000)")
+    parser.add_argument('--skip-seed', action='store_true', help="benchmark the existing table instead of seeding it")
+    parser.add_argument('--scenarios', nargs='*', help="scenarios to run: associates, lookup, lookup:<fields>, api, api:<list|ids>, mixed, render")
+    parser.add_argument('--requests', type=int, default=1000, help="requests per scenario")
+    parser.add_argument('--warmup', type=int, default=100, help="untimed requests sent before each scenario")
+    parser.add_argument('--concurrency', type=int, default=10, help="concurrent clients")
+    parser.add_argument('--base-url', help="benchmark a running server over HTTP instead of the app in process")
+    parser.add_argument('--seed', type=int, default=42, help="random seed for the data and the request mix")
+    parser.add_argument('--output', help="also write the JSON report to this file")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -1,94 +1,414 @@
 import tkinter as tk
-from tkinter import ttk
-
-def fetch_data():
-    import psycopg2
-
+from tkinter import ttk, filedialog
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from contextlib import contextmanager
+import csv
+import io
+import queue
+
+import psycopg2
+import psycopg2.pool
+import psycopg2.extras
+
+DB_CONFIG = {
+    "user": "postgres",
+    "password": "******",
+    "host": "127.0.0.1",
+    "port": "5432",
+    "database": "website"
+}
+
+# Number of background threads (and pooled connections) used for database calls
+DB_WORKERS = 2
+# How often the UI checks for finished database calls, in milliseconds
+UI_POLL_MS = 50
+
+db_pool = None
+executor = ThreadPoolExecutor(max_workers=DB_WORKERS)
+# Callbacks queued by worker threads, run on the Tk main thread
+ui_callbacks = queue.Queue()
+
+# Created on the main thread before any work is submitted, so worker threads
+# only ever share one pool; connections are opened lazily by getconn()
+def create_db_pool():
+    global db_pool
+    db_pool = psycopg2.pool.ThreadedConnectionPool(0, DB_WORKERS, **DB_CONFIG)
+
+# Borrow a pooled connection for one transaction, committing on success
+@contextmanager
+def db_cursor():
+    connection = db_pool.getconn()
     try:
-        connection = psycopg2.connect(
-            user="postgres",
-            password="******",
-            host="127.0.0.1",
-            port="5432",
-            database="website"
-        )
-
-        cursor = connection.cursor()
-        cursor.execute("SELECT * FROM associates_info")
-        rows = cursor.fetchall()
-        return rows
-
-    except (Exception, psycopg2.Error) as error:
-        print("Error while fetching data from PostgreSQL", error)
-
+        with connection:
+            with connection.cursor() as cursor:
+                yield cursor
     finally:
-        if connection:
-            cursor.close()
-            connection.close()
-
-def insert_data(id, name, hire_date, manager, department):
-    import psycopg2
-
+        db_pool.putconn(connection)
+
+# Run func on a worker thread and hand its result (or error) back to the UI
+# thread, where on_success or on_error is called from the root.after loop
+def run_in_background(func, *args, on_success=None, on_error=None):
+    def done(future):
+        error = future.exception()
+        if error is not None:
+            if on_error is not None:
+                ui_callbacks.put(lambda: on_error(error))
+        elif on_success is not None:
+            ui_callbacks.put(lambda: on_success(future.result()))
+
+    executor.submit(func, *args).add_done_callback(done)
+
+# A failing callback (e.g. updating a dialog that was closed meanwhile) is
+# reported and skipped so the rest of the queue and the polling loop keep going
+def process_ui_callbacks():
     try:
-        connection = psycopg2.connect(
-            user="postgres",
-            password="******",
-            host="127.0.0.1",
-            port="5432",
-            database="website"
-        )
-
-        cursor = connection.cursor()
-        insert_query = """INSERT INTO associates_info (ID, Name, Hire_Date, Manager, Department) 
-                          VALUES (%s, %s, %s, %s, %s)"""
-        cursor.execute(insert_query, (id, name, hire_date, manager, department))
-        connection.commit()
-
-    except (Exception, psycopg2.Error) as error:
-        print("Error while inserting data into PostgreSQL", error)
-
+        while True:
+            try:
+                callback = ui_callbacks.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback()
+            except Exception as error:
+                print("Error in UI callback", error)
     finally:
-        if connection:
-            cursor.close()
-            connection.close()
+        root.after(UI_POLL_MS, process_ui_callbacks)
 
-    # Refresh data in the table
-    refresh_table()
+# Columns shown in the table; Treeview items use the id as their iid
+COLUMNS = "ID, Name, Hire_Date, Manager, Department"
 
-def delete_data(id):
-    import psycopg2
+# Snapshot xmin taken before the last full or delta refresh. Every
+# transaction with a lower id had finished by then, so the next delta refresh
+# only needs rows written by transactions from this id on.
+synced_xmin = 0
 
-    try:
-        connection = psycopg2.connect(
-            user="postgres",
-            password="******",
-            host="127.0.0.1",
-            port="5432",
-            database="website"
-        )
+# Read before the data, so any transaction the data query does not see has an
+# id at or above it. Rows written by transactions that were still running are
+# fetched again next time; applying them twice is harmless.
+XMIN_QUERY = "SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint"
 
-        cursor = connection.cursor()
-        delete_query = """DELETE FROM associates_info WHERE ID = %s"""
-        cursor.execute(delete_query, (id,))
-        connection.commit()
+def fetch_data():
+    with db_cursor() as cursor:
+        cursor.execute(XMIN_QUERY)
+        xmin = cursor.fetchone()[0]
+        cursor.execute(f"SELECT {COLUMNS} FROM associates_info")
+        return cursor.fetchall(), xmin
+
+# Fetch rows inserted or updated by transactions from since_xmin on and ids
+# they deleted. TRUNCATE leaves no tombstones, so after one the whole table is
+# returned with truncated set and the caller replaces its rows.
+def fetch_changes(since_xmin):
+    with db_cursor() as cursor:
+        cursor.execute(XMIN_QUERY)
+        xmin = cursor.fetchone()[0]
+        cursor.execute("SELECT truncated_xid >= %s::text::xid8 FROM associates_info_version", (since_xmin,))
+        if cursor.fetchone()[0]:
+            cursor.execute(f"SELECT {COLUMNS} FROM associates_info")
+            return cursor.fetchall(), [], xmin, True
+        cursor.execute(f"SELECT {COLUMNS} FROM associates_info WHERE row_xid >= %s::text::xid8", (since_xmin,))
+        changed = cursor.fetchall()
+        cursor.execute("""SELECT d.id FROM associates_info_deleted d
+                          WHERE d.row_xid >= %s::text::xid8
+                          AND NOT EXISTS (SELECT 1 FROM associates_info a WHERE a.id = d.id)""", (since_xmin,))
+        deleted = [row[0] for row in cursor.fetchall()]
+        return changed, deleted, xmin, False
 
-    except (Exception, psycopg2.Error) as error:
-        print("Error while deleting data from PostgreSQL", error)
+def insert_data(id, name, hire_date, manager, department):
+    with db_cursor() as cursor:
+        insert_query = f"""INSERT INTO associates_info (ID, Name, Hire_Date, Manager, Department) 
+                           VALUES (%s, %s, %s, %s, %s) RETURNING {COLUMNS}"""
+        cursor.execute(insert_query, (id, name, hire_date, manager, department))
+        return cursor.fetchone()
+
+# Rows sent per INSERT by batch inserts; a few hundred rows go in one statement
+BATCH_INSERT_PAGE_SIZE = 1000
+
+# Insert every row in a single transaction, all or nothing
+def insert_many(rows):
+    with db_cursor() as cursor:
+        insert_query = f"""INSERT INTO associates_info (ID, Name, Hire_Date, Manager, Department)
+                           VALUES %s RETURNING {COLUMNS}"""
+        return psycopg2.extras.execute_values(cursor, insert_query, rows, page_size=BATCH_INSERT_PAGE_SIZE, fetch=True)
+
+# Delete all of the given ids in one statement
+def delete_data(ids):
+    with db_cursor() as cursor:
+        delete_query = """DELETE FROM associates_info WHERE ID = ANY(%s) RETURNING ID"""
+        cursor.execute(delete_query, (list(ids),))
+        return [row[0] for row in cursor.fetchall()]
+
+# Parse pasted or loaded rows of ID, Name, Hire Date, Manager, Department.
+# Tab-separated text (copied from a spreadsheet) and CSV are both accepted,
+# and a header row is skipped.
+def parse_batch_rows(text):
+    lines = text.strip().splitlines()
+    if not lines:
+        return []
+    delimiter = '\t' if '\t' in lines[0] else ','
+
+    rows = []
+    for line_number, fields in enumerate(csv.reader(io.StringIO("\n".join(lines)), delimiter=delimiter), start=1):
+        fields = [field.strip() for field in fields]
+        if not any(fields):
+            continue
+        if line_number == 1 and fields[0].lower() == "id":
+            continue
+        if len(fields) != 5:
+            raise ValueError(f"Line {line_number}: expected 5 fields, got {len(fields)}")
+        rows.append(tuple(fields))
+    return rows
+
+# Tables with more rows than this are shown in virtual-scrolling mode, where
+# only the visible rows are materialized in the Treeview
+VIRTUAL_MODE_THRESHOLD = 20000
+# Rows shown at once, rows fetched per page, and pages kept in the LRU
+VISIBLE_ROWS = 25
+PAGE_SIZE = 200
+PAGE_CACHE_PAGES = 8
+# Rows kept loaded around the visible window, and how close to either end of
+# them scrolling may get before the next page is fetched
+MAX_BUFFERED_ROWS = PAGE_SIZE * 4
+PREFETCH_ROWS = PAGE_SIZE // 2
+
+# Virtual table set up by start_table when the table is large; None otherwise
+virtual_table = None
+
+# Smallest and largest id plus an estimate of the row count, read from the
+# planner statistics so it stays cheap on very large tables
+def fetch_table_stats():
+    with db_cursor() as cursor:
+        cursor.execute("""SELECT min(id), max(id),
+                                 (SELECT reltuples::bigint FROM pg_class WHERE oid = 'associates_info'::regclass)
+                          FROM associates_info""")
+        return cursor.fetchone()
+
+# Fetch one page by keyset on id: the rows after anchor_id, or the rows
+# before it (returned in ascending order)
+def fetch_page(direction, anchor_id):
+    with db_cursor() as cursor:
+        if direction == 'after':
+            cursor.execute(f"SELECT {COLUMNS} FROM associates_info WHERE id > %s ORDER BY id LIMIT %s", (anchor_id, PAGE_SIZE))
+            return cursor.fetchall()
+        cursor.execute(f"SELECT {COLUMNS} FROM associates_info WHERE id < %s ORDER BY id DESC LIMIT %s", (anchor_id, PAGE_SIZE))
+        return cursor.fetchall()[::-1]
+
+# Treeview driver that keeps a bounded, contiguous run of rows around the
+# visible window, extends it page by page as the user scrolls and shows only
+# VISIBLE_ROWS of it. The scrollbar position is interpolated from the id range.
+class VirtualTable:
+    def __init__(self, tree, scrollbar):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.rows = []
+        self.top = 0
+        self.pages = OrderedDict()
+        self.pending = set()
+        self.anchor = None
+        self.exhausted = {'before': False, 'after': False}
+        self.min_id = self.max_id = None
+
+    def start(self, min_id, max_id):
+        self.set_range(min_id, max_id)
+        self.jump_to(self.min_id - 1)
+
+    # Id range the scrollbar position is interpolated over
+    def set_range(self, min_id, max_id):
+        self.min_id = min_id or 0
+        self.max_id = max_id or 0
+
+    # Show the rows following after_id, discarding the loaded run
+    def jump_to(self, after_id):
+        self.rows = []
+        self.top = 0
+        self.exhausted = {'before': False, 'after': False}
+        self.anchor = ('after', after_id)
+        self.request(*self.anchor)
+        self.render()
+
+    # Drop cached pages after a write and reload around the current position
+    def reload(self):
+        self.pages.clear()
+        first_id = self.rows[self.top][0] if self.top < len(self.rows) else self.min_id
+        run_in_background(
+            fetch_table_stats,
+            on_success=lambda stats: (self.set_range(stats[0], stats[1]), self.jump_to(first_id - 1)),
+            on_error=lambda error: print("Error while fetching data from PostgreSQL", error)
+        )
 
-    finally:
-        if connection:
-            cursor.close()
-            connection.close()
+    def request(self, direction, anchor_id):
+        key = (direction, anchor_id)
+        if key in self.pages:
+            self.pages.move_to_end(key)
+            self.add_page(key, self.pages[key])
+            return
+        if key in self.pending:
+            return
+        self.pending.add(key)
+        run_in_background(
+            fetch_page, direction, anchor_id,
+            on_success=lambda rows: self.page_loaded(key, rows),
+            on_error=lambda error: (self.pending.discard(key), print("Error while fetching data from PostgreSQL", error))
+        )
 
-    # Refresh data in the table
-    refresh_table()
+    def page_loaded(self, key, rows):
+        self.pending.discard(key)
+        self.pages[key] = rows
+        while len(self.pages) > PAGE_CACHE_PAGES:
+            self.pages.popitem(last=False)
+        self.add_page(key, rows)
+
+    # Attach a page to the loaded run if it still borders it, then trim the
+    # far end of the run so it never grows past MAX_BUFFERED_ROWS
+    def add_page(self, key, rows):
+        direction, anchor_id = key
+        if direction == 'after':
+            if self.rows[-1:] and self.rows[-1][0] != anchor_id or not self.rows and key != self.anchor:
+                return
+            self.exhausted['after'] = len(rows) < PAGE_SIZE
+            self.rows.extend(rows)
+            excess = len(self.rows) - MAX_BUFFERED_ROWS
+            if excess > 0 and self.top > excess:
+                del self.rows[:excess]
+                self.top -= excess
+                self.exhausted['before'] = False
+        else:
+            if not self.rows or self.rows[0][0] != anchor_id:
+                return
+            self.exhausted['before'] = len(rows) < PAGE_SIZE
+            self.rows[:0] = rows
+            self.top += len(rows)
+            excess = len(self.rows) - MAX_BUFFERED_ROWS
+            if excess > 0 and self.top + VISIBLE_ROWS < len(self.rows) - excess:
+                del self.rows[-excess:]
+                self.exhausted['after'] = False
+        self.render()
+        self.prefetch()
+
+    def prefetch(self):
+        if not self.rows:
+            return
+        if not self.exhausted['after'] and len(self.rows) - (self.top + VISIBLE_ROWS) < PREFETCH_ROWS:
+            self.request('after', self.rows[-1][0])
+        if not self.exhausted['before'] and self.top < PREFETCH_ROWS:
+            self.request('before', self.rows[0][0])
+
+    def scroll(self, delta):
+        self.top = max(0, min(self.top + delta, len(self.rows) - VISIBLE_ROWS))
+        self.render()
+        self.prefetch()
+
+    def render(self):
+        if self.exhausted['after']:
+            self.top = max(0, min(self.top, len(self.rows) - VISIBLE_ROWS))
+        window = self.rows[self.top:self.top + VISIBLE_ROWS]
+        self.tree.delete(*self.tree.get_children())
+        for row in window:
+            self.tree.insert("", "end", iid=str(row[0]), values=row)
+
+        span = max(self.max_id - self.min_id, 1)
+        if window:
+            self.scrollbar.set((window[0][0] - self.min_id) / span, (window[-1][0] - self.min_id) / span)
+
+    def on_scrollbar(self, action, value, unit=None):
+        if action == 'moveto':
+            fraction = min(max(float(value), 0.0), 1.0)
+            self.jump_to(int(self.min_id + fraction * (self.max_id - self.min_id)) - 1)
+        elif action == 'scroll':
+            self.scroll(int(value) * (VISIBLE_ROWS if unit == 'pages' else 1))
+
+    def on_mousewheel(self, event):
+        if event.num == 4:
+            self.scroll(-3)
+        elif event.num == 5:
+            self.scroll(3)
+        else:
+            self.scroll(-3 if event.delta > 0 else 3)
+        return "break"
+
+# Pick the display mode once the table size is known and load the first rows
+def start_table(stats):
+    global virtual_table
+    min_id, max_id, estimated_rows = stats
+    if estimated_rows is None or estimated_rows < 0:
+        # Never analyzed; the id range is an upper bound on the row count
+        estimated_rows = (max_id - min_id + 1) if min_id is not None else 0
+
+    if estimated_rows > VIRTUAL_MODE_THRESHOLD:
+        virtual_table = VirtualTable(tree, scrollbar)
+        scrollbar.configure(command=virtual_table.on_scrollbar)
+        tree.bind("<MouseWheel>", virtual_table.on_mousewheel)
+        tree.bind("<Button-4>", virtual_table.on_mousewheel)
+        tree.bind("<Button-5>", virtual_table.on_mousewheel)
+        virtual_table.start(min_id, max_id)
+    else:
+        tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.configure(command=tree.yview)
+        refresh_table()
+
+def upsert_row(row):
+    if virtual_table is not None:
+        virtual_table.reload()
+        return
+    iid = str(row[0])
+    if tree.exists(iid):
+        tree.item(iid, values=row)
+    else:
+        tree.insert("", "end", iid=iid, values=row)
+
+def upsert_rows(rows):
+    if virtual_table is not None:
+        virtual_table.reload()
+        return
+    for row in rows:
+        upsert_row(row)
+
+def remove_rows(ids):
+    if virtual_table is not None:
+        virtual_table.reload()
+        return
+    for id in ids:
+        if tree.exists(str(id)):
+            tree.delete(str(id))
+
+def populate_table(result):
+    global synced_xmin
+    rows, synced_xmin = result
+    tree.delete(*tree.get_children())
+    for row in rows:
+        tree.insert("", "end", iid=str(row[0]), values=row)
+
+def apply_changes(result):
+    global synced_xmin
+    changed, deleted, xmin, truncated = result
+    if truncated:
+        populate_table((changed, xmin))
+        return
+    remove_rows(deleted)
+    for row in changed:
+        upsert_row(row)
+    synced_xmin = max(synced_xmin, xmin)
 
 def refresh_table():
-    for i in tree.get_children():
-        tree.delete(i)
-    data = fetch_data()
-    for row in data:
-        tree.insert("", "end", values=row)
+    if virtual_table is not None:
+        virtual_table.reload()
+        return
+    run_in_background(
+        fetch_data,
+        on_success=populate_table,
+        on_error=lambda error: print("Error while fetching data from PostgreSQL", error)
+    )
+
+# Apply only the rows changed since the last full or delta refresh
+def refresh_changes():
+    if virtual_table is not None:
+        virtual_table.reload()
+        return
+    run_in_background(
+        fetch_changes, synced_xmin,
+        on_success=apply_changes,
+        on_error=lambda error: print("Error while fetching data from PostgreSQL", error)
+    )
 
 def on_insert_button_click():
     id = entry_id.get()
@@ -97,17 +417,69 @@ def on_insert_button_click():
     manager = entry_manager.get()
     department = entry_department.get()
 
-    insert_data(id, name, hire_date, manager, department)
+    run_in_background(
+        insert_data, id, name, hire_date, manager, department,
+        # Show just the new row instead of reloading the table
+        on_success=upsert_row,
+        on_error=lambda error: print("Error while inserting data into PostgreSQL", error)
+    )
 
 def on_delete_button_click():
-    selected_item = tree.selection()
-    if selected_item:
-        item = tree.item(selected_item)
-        id = item['values'][0]
-        delete_data(id)
+    # Treeview iids are the row ids, so every selected row goes in one DELETE
+    ids = [int(iid) for iid in tree.selection()]
+    if ids:
+        run_in_background(
+            delete_data, ids,
+            # Remove just the deleted rows instead of reloading the table
+            on_success=remove_rows,
+            on_error=lambda error: print("Error while deleting data from PostgreSQL", error)
+        )
+
+# Dialog for inserting many rows at once, pasted or loaded from a CSV file
+def open_batch_insert_dialog():
+    dialog = tk.Toplevel(root)
+    dialog.title("Batch Insert")
+
+    tk.Label(dialog, text="Paste rows: ID, Name, Hire Date, Manager, Department").pack(padx=10, pady=5)
+    text = tk.Text(dialog, width=80, height=20)
+    text.pack(expand=True, fill='both', padx=10)
+    status = tk.Label(dialog, text="")
+    status.pack(pady=5)
+
+    def on_load_csv():
+        path = filedialog.askopenfilename(parent=dialog, filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+        if path:
+            with open(path, newline='') as file:
+                text.delete("1.0", "end")
+                text.insert("1.0", file.read())
+
+    def on_inserted(rows):
+        upsert_rows(rows)
+        status.config(text=f"Inserted {len(rows)} rows")
+        text.delete("1.0", "end")
+
+    def on_insert_all():
+        try:
+            rows = parse_batch_rows(text.get("1.0", "end"))
+        except ValueError as error:
+            status.config(text=str(error))
+            return
+        if not rows:
+            return
+        status.config(text=f"Inserting {len(rows)} rows...")
+        run_in_background(
+            insert_many, rows,
+            on_success=on_inserted,
+            on_error=lambda error: status.config(text=f"Error while inserting data into PostgreSQL: {error}")
+        )
+
+    button_frame = tk.Frame(dialog)
+    button_frame.pack(pady=10)
+    tk.Button(button_frame, text="Load CSV...", command=on_load_csv).pack(side='left', padx=5)
+    tk.Button(button_frame, text="Insert All", command=on_insert_all).pack(side='left', padx=5)
 
 def create_table_gui():
-    global tree, entry_id, entry_name, entry_hire_date, entry_manager, entry_department
+    global root, tree, scrollbar, entry_id, entry_name, entry_hire_date, entry_manager, entry_department
 
     root = tk.Tk()
     root.title("Associates Data")
@@ -130,7 +502,9 @@ def create_table_gui():
 
     # Creating a treeview to display the data
     columns = ("col1", "col2", "col3", "col4", "col5")
-    tree = ttk.Treeview(root, columns=columns, show="headings")
+    table_frame = tk.Frame(root)
+    tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=VISIBLE_ROWS, selectmode="extended")
+    scrollbar = ttk.Scrollbar(table_frame, orient="vertical")
 
     # Define headings
     tree.heading("col1", text="ID", anchor=tk.CENTER)
@@ -143,10 +517,16 @@ def create_table_gui():
     for col in columns:
         tree.column(col, anchor=tk.CENTER)
 
-    # Inserting data into the treeview
-    refresh_table()
+    # Inserting data into the treeview, virtually scrolled if the table is large
+    run_in_background(
+        fetch_table_stats,
+        on_success=start_table,
+        on_error=lambda error: print("Error while fetching data from PostgreSQL", error)
+    )
 
-    tree.pack(expand=True, fill='both')
+    scrollbar.pack(side='right', fill='y')
+    tree.pack(side='left', expand=True, fill='both')
+    table_frame.pack(expand=True, fill='both')
 
     # Form for inserting new data
     form_frame = tk.Frame(root)
@@ -174,12 +554,29 @@ def create_table_gui():
 
     insert_button = tk.Button(form_frame, text="Insert", command=on_insert_button_click)
     insert_button.grid(row=5, column=0, columnspan=2, pady=10)
+    batch_insert_button = tk.Button(form_frame, text="Batch Insert...", command=open_batch_insert_dialog)
+    batch_insert_button.grid(row=6, column=0, columnspan=2)
 
     # Delete button
     delete_button = tk.Button(root, text="Delete Selected", command=on_delete_button_click)
     delete_button.pack(pady=10)
+
+    # Refresh buttons: changes since the last refresh, or the whole table
+    refresh_frame = tk.Frame(root)
+    refresh_frame.pack(pady=5)
+    tk.Button(refresh_frame, text="Refresh Changes", command=refresh_changes).pack(side='left', padx=5)
+    tk.Button(refresh_frame, text="Reload All", command=refresh_table).pack(side='left', padx=5)
+    root.protocol("WM_DELETE_WINDOW", on_close)
+    process_ui_callbacks()
     # Start the GUI
     root.mainloop()
 
+def on_close():
+    root.destroy()
+    executor.shutdown(wait=False, cancel_futures=True)
+    if db_pool is not None:
+        db_pool.closeall()
+
 if __name__ == "__main__":
+    create_db_pool()
     create_table_gui()
\ No newline at end of file
@@ -0,0 +1,23 @@
+import asyncio
+import os
+
+import uvicorn
+
+import migrations
+
+# Address to listen on and number of worker processes
+HOST = os.environ.get('HOST', '127.0.0.1')
+PORT = int(os.environ.get('PORT', 8000))
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1))
+# Seconds a shutdown waits for open requests before cancelling them, so each
+# worker's shutdown handlers still run
+GRACEFUL_SHUTDOWN_SECONDS = int(os.environ.get('GRACEFUL_SHUTDOWN_SECONDS', 10))
+
+# Bring the schema up to date once, then start the workers, which only check
+# the schema version at startup. The app is passed as an import string so
+# each worker imports app.py itself; the workers also re-import this module,
+# which is why the app is not started from app.py.
+if __name__ == "__main__":
+    asyncio.run(migrations.migrate_database())
+    uvicorn.run("app:app", host=HOST, port=PORT, workers=WEB_CONCURRENCY,
+                timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_SECONDS)
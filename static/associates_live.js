@@ -0,0 +1,174 @@
+// Keep an /associates page current by applying the server-sent events from
+// /associates/changes, and submit the forms on the page without reloading it.
+(function () {
+    var pagination = document.querySelector('.pagination');
+    if (!pagination || !window.EventSource) {
+        return;
+    }
+    var container = document.querySelector('.container');
+    var bottom = document.querySelector('.bottom-container');
+    var page = pagination.dataset;
+
+    function cell(text) {
+        var td = document.createElement('td');
+        td.textContent = text;
+        return td;
+    }
+
+    // Whether a row belongs in the id range and department this page shows
+    function onPage(row) {
+        if (page.department && row.department !== page.department) {
+            return false;
+        }
+        if (page.firstId && row.id < Number(page.firstId)) {
+            return false;
+        }
+        return page.hasNext !== 'true' || !page.lastId || row.id <= Number(page.lastId);
+    }
+
+    // Find the table body of a department, creating the section in
+    // department order when the page does not show it yet
+    function departmentBody(department) {
+        var sections = container.querySelectorAll('.table-container');
+        var next = bottom;
+        for (var i = 0; i < sections.length; i++) {
+            if (sections[i].dataset.department === department) {
+                return sections[i].querySelector('tbody');
+            }
+            if (sections[i].dataset.department > department) {
+                next = sections[i];
+                break;
+            }
+        }
+        var section = document.createElement('div');
+        section.className = 'table-container';
+        section.dataset.department = department;
+        var heading = document.createElement('h2');
+        var link = document.createElement('a');
+        link.href = '/associates?department=' + encodeURIComponent(department);
+        link.textContent = department + ' Department';
+        heading.appendChild(link);
+        section.appendChild(heading);
+        var table = document.createElement('table');
+        var head = table.createTHead().insertRow();
+        ['ID', 'Name', 'Hire Date', 'Manager'].forEach(function (title) {
+            var th = document.createElement('th');
+            th.textContent = title;
+            head.appendChild(th);
+        });
+        var body = document.createElement('tbody');
+        table.appendChild(body);
+        section.appendChild(table);
+        container.insertBefore(section, next);
+        return body;
+    }
+
+    function removeRow(id) {
+        var tr = container.querySelector('tr[data-id="' + id + '"]');
+        if (!tr) {
+            return;
+        }
+        var section = tr.closest('.table-container');
+        tr.remove();
+        if (section && !section.querySelector('tbody tr')) {
+            section.remove();
+        }
+    }
+
+    function upsertRow(row) {
+        removeRow(row.id);
+        if (!onPage(row)) {
+            return;
+        }
+        var tr = document.createElement('tr');
+        tr.dataset.id = row.id;
+        [row.id, row.name, row.hire_date, row.manager].forEach(function (value) {
+            tr.appendChild(cell(value));
+        });
+        var body = departmentBody(row.department);
+        var rows = body.querySelectorAll('tr');
+        for (var i = 0; i < rows.length; i++) {
+            if (Number(rows[i].dataset.id) > row.id) {
+                body.insertBefore(tr, rows[i]);
+                return;
+            }
+        }
+        body.appendChild(tr);
+    }
+
+    var banner = null;
+    function showBanner(message, reload) {
+        if (!banner) {
+            banner = document.createElement('p');
+            banner.className = 'live-banner';
+            document.body.insertBefore(banner, container);
+        }
+        banner.textContent = message + ' ';
+        if (reload) {
+            var link = document.createElement('a');
+            link.href = window.location.href;
+            link.textContent = 'Reload';
+            banner.appendChild(link);
+        }
+    }
+
+    // Forms are only submitted in place while the stream is open; otherwise
+    // (stream disabled, listener down, reconnecting) they submit normally
+    var live = false;
+    var url = '/associates/changes' + (page.version ? '?since=' + page.version : '');
+    var source = new EventSource(url);
+    source.addEventListener('open', function () {
+        live = true;
+    });
+    source.addEventListener('error', function () {
+        live = false;
+    });
+    source.addEventListener('change', function (event) {
+        var change = JSON.parse(event.data);
+        (change.deleted || []).forEach(removeRow);
+        change.rows.forEach(function (row) {
+            if (change.op === 'DELETE') {
+                removeRow(row.id);
+            } else {
+                upsertRow(row);
+            }
+        });
+    });
+    source.addEventListener('reload', function () {
+        live = false;
+        source.close();
+        showBanner('Associates changed too much to update this page in place.', true);
+    });
+
+    // The write routes answer with a redirect back to /associates; the change
+    // stream brings the page up to date, so the redirect is not followed. If
+    // the stream went away while the write was in flight, the page reloads.
+    document.querySelectorAll('.form-container form').forEach(function (form) {
+        form.addEventListener('submit', function (event) {
+            if (!live) {
+                return;
+            }
+            event.preventDefault();
+            fetch(form.action, {method: 'POST', body: new URLSearchParams(new FormData(form)), redirect: 'manual'})
+                .then(function (response) {
+                    if (response.type === 'opaqueredirect' || response.ok) {
+                        if (!live) {
+                            window.location.reload();
+                            return;
+                        }
+                        form.reset();
+                        showBanner('Saved.', false);
+                        return;
+                    }
+                    return response.json().then(function (body) {
+                        showBanner('Error: ' + (body.detail || response.statusText), false);
+                    }, function () {
+                        showBanner('Error: ' + response.statusText, false);
+                    });
+                })
+                .catch(function () {
+                    showBanner('Could not reach the server.', false);
+                });
+        });
+    });
+})();
@@ -0,0 +1,20 @@
+import os
+import sys
+from contextlib import asynccontextmanager
+
+import pytest
+
+# The modules under test live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+
+# Make app.acquire_connection hand out the given stand-in connection
+@pytest.fixture
+def fake_connection(monkeypatch):
+    def use(conn):
+        @asynccontextmanager
+        async def acquire_connection(priority=None, replica=False):
+            yield conn
+        monkeypatch.setattr(app, 'acquire_connection', acquire_connection)
+    return use
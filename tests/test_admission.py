@@ -0,0 +1,129 @@
+import asyncio
+
+import asyncpg
+import pytest
+from fastapi import HTTPException
+from prometheus_client import REGISTRY
+
+import app
+from app import AdmissionController
+
+def shed_count(name, priority):
+    return REGISTRY.get_sample_value('admission_shed_total', {'pool': name, 'priority': priority}) or 0
+
+def test_slots_are_handed_out_up_to_the_limit():
+    async def scenario():
+        controller = AdmissionController('test-limit', 2, 10, 1)
+        await controller.acquire('read')
+        await controller.acquire('read')
+        waiter = asyncio.create_task(controller.acquire('read'))
+        await asyncio.sleep(0)
+        assert not waiter.done() and controller.queued('read') == 1
+        controller.release()
+        await waiter
+        assert controller.in_flight == 2
+        controller.release()
+        controller.release()
+        assert controller.in_flight == 0
+
+    asyncio.run(scenario())
+
+def test_released_slot_goes_to_the_highest_priority_waiter():
+    async def scenario():
+        controller = AdmissionController('test-order', 1, 10, 1)
+        await controller.acquire('read')
+        order = []
+
+        async def wait(priority):
+            await controller.acquire(priority)
+            order.append(priority)
+
+        waiters = [asyncio.create_task(wait(priority)) for priority in ('bulk', 'read', 'write')]
+        await asyncio.sleep(0)
+        for _ in waiters:
+            controller.release()
+            await asyncio.sleep(0)
+        await asyncio.gather(*waiters)
+        assert order == ['write', 'read', 'bulk']
+
+    asyncio.run(scenario())
+
+def test_full_queue_sheds_the_lowest_priority_waiter():
+    async def scenario():
+        controller = AdmissionController('test-displace', 1, 1, 1)
+        await controller.acquire('read')
+        bulk = asyncio.create_task(controller.acquire('bulk'))
+        await asyncio.sleep(0)
+        write = asyncio.create_task(controller.acquire('write'))
+        with pytest.raises(HTTPException) as shed:
+            await bulk
+        assert shed.value.status_code == 503
+        assert shed.value.headers == {"Retry-After": str(app.ADMISSION_RETRY_AFTER_SECONDS)}
+        controller.release()
+        await write
+
+    asyncio.run(scenario())
+    assert shed_count('test-displace', 'bulk') == 1
+
+def test_full_queue_turns_away_a_request_that_ranks_no_higher():
+    async def scenario():
+        controller = AdmissionController('test-reject', 1, 1, 1)
+        await controller.acquire('read')
+        waiter = asyncio.create_task(controller.acquire('read'))
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException):
+            controller.reject_if_full('read')
+        with pytest.raises(HTTPException):
+            await controller.acquire('bulk')
+        controller.release()
+        await waiter
+
+    asyncio.run(scenario())
+    assert shed_count('test-reject', 'read') == 1
+    assert shed_count('test-reject', 'bulk') == 1
+
+def test_queue_timeout_sheds_the_waiter():
+    async def scenario():
+        controller = AdmissionController('test-timeout', 1, 10, 0.01)
+        await controller.acquire('read')
+        with pytest.raises(HTTPException):
+            await controller.acquire('read')
+        assert controller.queued('read') == 0
+        assert controller.in_flight == 1
+
+    asyncio.run(scenario())
+    assert shed_count('test-timeout', 'read') == 1
+
+def test_cancelled_waiter_does_not_keep_a_slot():
+    async def scenario():
+        controller = AdmissionController('test-cancel', 1, 10, 1)
+        await controller.acquire('read')
+        waiter = asyncio.create_task(controller.acquire('read'))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        controller.release()
+        assert controller.in_flight == 0
+
+    asyncio.run(scenario())
+
+class DeleteConnection:
+    def __init__(self, error=None):
+        self.error = error
+
+    async def execute(self, query, *args):
+        if self.error is not None:
+            raise self.error
+        return "DELETE 0"
+
+def test_delete_of_a_missing_associate_is_a_404(fake_connection):
+    fake_connection(DeleteConnection())
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(app.delete_associate(1))
+    assert error.value.status_code == 404
+
+def test_delete_timeout_reaches_the_503_handler(fake_connection):
+    canceled = asyncpg.exceptions.QueryCanceledError("canceling statement due to statement timeout")
+    fake_connection(DeleteConnection(canceled))
+    with pytest.raises(asyncpg.exceptions.QueryCanceledError):
+        asyncio.run(app.delete_associate(1))
@@ -0,0 +1,89 @@
+import json
+
+from app import CHANGE_STREAM_RELOAD_EVENT, ChangeBroadcaster, render_pagination
+
+def change(version, **extra):
+    return {'op': 'UPDATE', 'version': version, 'rows': [], **extra}
+
+def publish(broadcaster, version, **extra):
+    payload = change(version, **extra)
+    broadcaster.publish(payload, json.dumps(payload))
+
+def drain(queue):
+    messages = []
+    while not queue.empty():
+        messages.append(queue.get_nowait())
+    return messages
+
+def event_ids(messages):
+    return [int(message.split("\n")[0].removeprefix("id: ")) for message in messages]
+
+def test_replays_changes_published_before_subscribing():
+    broadcaster = ChangeBroadcaster(16, 16)
+    for version in (5, 6, 7):
+        publish(broadcaster, version)
+    queue, tracking = broadcaster.subscribe(5)
+    assert tracking
+    assert event_ids(drain(queue)) == [6, 7]
+
+def test_replay_does_not_depend_on_the_version_read_later():
+    # The version the handler reads afterwards may already include changes
+    # that were published before the subscription; they must be replayed
+    broadcaster = ChangeBroadcaster(16, 16)
+    publish(broadcaster, 5)
+    publish(broadcaster, 6)
+    queue, _ = broadcaster.subscribe(5)
+    assert event_ids(drain(queue)) == [6]
+
+def test_changes_published_after_subscribing_are_queued():
+    broadcaster = ChangeBroadcaster(16, 16)
+    publish(broadcaster, 1)
+    queue, _ = broadcaster.subscribe(1)
+    publish(broadcaster, 2)
+    assert event_ids(drain(queue)) == [2]
+
+def test_reload_when_history_does_not_reach_back():
+    broadcaster = ChangeBroadcaster(16, 2)
+    for version in range(1, 6):
+        publish(broadcaster, version)
+    queue, _ = broadcaster.subscribe(1)
+    assert drain(queue) == [CHANGE_STREAM_RELOAD_EVENT]
+
+def test_gap_in_versions_sends_reload_and_forgets_history():
+    broadcaster = ChangeBroadcaster(16, 16)
+    queue, _ = broadcaster.subscribe(None)
+    publish(broadcaster, 1)
+    publish(broadcaster, 3)
+    assert drain(queue)[-1] == CHANGE_STREAM_RELOAD_EVENT
+    assert not broadcaster.history
+
+def test_bulk_change_sends_reload():
+    broadcaster = ChangeBroadcaster(16, 16)
+    queue, _ = broadcaster.subscribe(None)
+    publish(broadcaster, 1, reload=True)
+    assert drain(queue) == [CHANGE_STREAM_RELOAD_EVENT]
+
+def test_untracked_after_reload():
+    broadcaster = ChangeBroadcaster(16, 16)
+    publish(broadcaster, 1)
+    broadcaster.publish_reload()
+    _, tracking = broadcaster.subscribe(1)
+    assert not tracking
+
+def test_full_queue_is_replaced_by_reload():
+    broadcaster = ChangeBroadcaster(2, 16)
+    queue, _ = broadcaster.subscribe(None)
+    for version in (1, 2, 3):
+        publish(broadcaster, version)
+    assert drain(queue) == [CHANGE_STREAM_RELOAD_EVENT]
+
+def test_close_ends_every_stream():
+    broadcaster = ChangeBroadcaster(4, 16)
+    queue, _ = broadcaster.subscribe(None)
+    publish(broadcaster, 1)
+    broadcaster.close()
+    assert drain(queue) == [None]
+
+def test_pagination_without_version_leaves_attribute_empty():
+    assert 'data-version=""' in render_pagination(1, 2, False, False, 100, None, None)
+    assert 'data-version="7"' in render_pagination(1, 2, False, False, 100, None, 7)
@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta, timezone
+
+from starlette.requests import Request
+
+import app
+
+def request(method="GET", **headers):
+    return Request({'type': 'http', 'method': method, 'path': '/',
+                    'headers': [(name.replace('_', '-').encode(), value.encode()) for name, value in headers.items()]})
+
+def test_last_modified_is_the_next_whole_second():
+    modified_at = datetime(2024, 1, 1, 12, 0, 0, 250000, tzinfo=timezone.utc)
+    headers = app.validator_headers('W/"x"', modified_at)
+    assert headers["Last-Modified"] == "Mon, 01 Jan 2024 12:00:01 GMT"
+
+def test_last_modified_is_withheld_until_its_second_has_passed():
+    modified_at = datetime.now(timezone.utc) + timedelta(seconds=5)
+    assert "Last-Modified" not in app.validator_headers('W/"x"', modified_at)
+
+def test_write_after_the_last_modified_second_is_not_a_304():
+    earlier = datetime(2024, 1, 1, 12, 0, 0, 250000, tzinfo=timezone.utc)
+    since = app.validator_headers('W/"x"', earlier)["Last-Modified"]
+    assert app.is_not_modified(request(if_modified_since=since), 'W/"x"', earlier)
+    later = earlier + timedelta(seconds=1)
+    assert not app.is_not_modified(request(if_modified_since=since), 'W/"x"', later)
+
+def test_only_get_and_head_are_conditional():
+    assert app.is_not_modified(request("HEAD", if_none_match='W/"x"'), 'W/"x"')
+    assert not app.is_not_modified(request("POST", if_none_match='W/"x"'), 'W/"x"')
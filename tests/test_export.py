@@ -0,0 +1,34 @@
+import asyncio
+
+import app
+
+class EndlessCopyConnection:
+    async def copy_from_query(self, query, *values, output, **options):
+        while True:
+            await output(b"1,Name,2020-01-01,Manager,Department\n")
+
+class FailingCopyConnection:
+    async def copy_from_query(self, query, *values, output, **options):
+        await output(b"id,name\n")
+        raise RuntimeError("connection lost")
+
+def test_client_disconnect_stops_the_copy(fake_connection):
+    fake_connection(EndlessCopyConnection())
+
+    async def read_then_disconnect():
+        export = app.stream_copy_export('SELECT 1', [])
+        # Let the copy fill the queue before the client goes away
+        await export.__anext__()
+        await asyncio.sleep(0.01)
+        await export.aclose()
+        return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+    assert asyncio.run(read_then_disconnect()) == []
+
+def test_failed_copy_ends_the_export(fake_connection):
+    fake_connection(FailingCopyConnection())
+
+    async def read_all():
+        return [chunk async for chunk in app.stream_copy_export('SELECT 1', [])]
+
+    assert asyncio.run(asyncio.wait_for(read_all(), 5)) == [b"id,name\n"]
@@ -0,0 +1,69 @@
+import asyncio
+import json
+import os
+
+import asyncpg
+import pytest
+
+import app
+import benchmark
+import migrations
+
+# Seeding truncates associates_info, so these tests only run against a
+# database named explicitly for them
+TEST_DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
+TEST_SEED_ROWS = int(os.environ.get('TEST_SEED_ROWS', 1_000_000))
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+# Every node of an EXPLAIN plan, depth first
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from plan_nodes(child)
+
+async def seed_and_sample():
+    conn = await asyncpg.connect(TEST_DATABASE_URL)
+    try:
+        await migrations.migrate(conn)
+        if not await migrations.trigram_indexes_ready(conn):
+            return None
+        await benchmark.seed_associates(conn, TEST_SEED_ROWS, seed=3)
+        return await conn.fetchrow('SELECT id, name, manager, department FROM associates_info ORDER BY id LIMIT 1')
+    finally:
+        await conn.close()
+
+@pytest.fixture(scope='module')
+def associate():
+    associate = asyncio.run(seed_and_sample())
+    if associate is None:
+        pytest.skip("pg_trgm is not installed on the test database")
+    return associate
+
+async def explain(key, values):
+    conn = await asyncpg.connect(TEST_DATABASE_URL)
+    try:
+        plan = await conn.fetchval('EXPLAIN (FORMAT JSON) ' + app.LOOKUP_STATEMENTS[key], *values)
+    finally:
+        await conn.close()
+    return json.loads(plan)[0]['Plan']
+
+# A department matches about a twelfth of the table, which is rightly read
+# with a sequential scan, so only lookups naming a person are checked
+SELECTIVE_COMBINATIONS = [fields for fields in app.field_combinations(app.LOOKUP_FIELDS)
+                          if fields != ('department',) and 'id' not in fields]
+
+@pytest.mark.parametrize('order', [None, 'similarity'])
+@pytest.mark.parametrize('fields', SELECTIVE_COMBINATIONS, ids="+".join)
+def test_substring_lookup_uses_trigram_index(associate, fields, order, monkeypatch):
+    monkeypatch.setattr(app, 'trigram_search_enabled', True)
+    key, values = app.build_lookup_query(None, associate['name'] if 'name' in fields else None,
+                                         associate['manager'] if 'manager' in fields else None,
+                                         associate['department'] if 'department' in fields else None,
+                                         ranked=order is not None)
+    assert key == (fields, order)
+
+    nodes = list(plan_nodes(asyncio.run(explain(key, values))))
+    index_names = {node.get('Index Name') for node in nodes}
+    assert index_names & {f'associates_info_{column}_trgm_idx' for column in migrations.SEARCH_COLUMNS}
+    assert not any(node['Node Type'] == 'Seq Scan' and node.get('Relation Name') == 'associates_info' for node in nodes)
@@ -0,0 +1,87 @@
+from datetime import date
+
+from app import MemoryReplica
+
+HIRED = date(2020, 1, 1)
+
+def replica_with(rows, version=1):
+    replica = MemoryReplica()
+    for row in rows:
+        replica.upsert(*row)
+    replica.version = version
+    return replica
+
+def ids(members):
+    return [member['id'] for member in members]
+
+ORG = [
+    (1, "Ada", HIRED, "Board", "Executive"),
+    (2, "Bob", HIRED, "Ada", "Sales"),
+    (3, "Cy", HIRED, "Ada", "Support"),
+    (4, "Di", HIRED, "Bob", "Sales"),
+    (5, "Bob", HIRED, "Cy", "Support"),
+]
+
+def test_search_matches_substrings_case_insensitively():
+    replica = replica_with(ORG)
+    assert ids(replica.search(1, (('name',), 'id'), None, "BO", None, None, 10)) == [2, 5]
+    assert ids(replica.search(1, (('department',), 'id'), None, None, None, "port", 10)) == [3, 5]
+    assert ids(replica.search(1, (('name', 'department'), 'id'), None, "bob", None, "sales", 10)) == [2]
+
+def test_search_falls_back_to_sql():
+    replica = replica_with(ORG)
+    assert replica.search(2, (('name',), 'id'), None, "Bob", None, None, 10) is None
+    assert replica.search(1, (('name',), 'similarity'), None, "Bob", None, None, 10) is None
+    assert replica.search(1, (('name',), 'id'), None, "B%", None, None, 10) is None
+    assert replica.fallbacks == 3
+
+def test_renamed_associate_is_not_found_under_the_old_name():
+    replica = replica_with(ORG)
+    replica.upsert(4, "Eve", HIRED, "Bob", "Sales")
+    assert replica.search(1, (('name',), 'id'), None, "Di", None, None, 10) == []
+    assert ids(replica.search(1, (('name',), 'id'), None, "Eve", None, None, 10)) == [4]
+
+def test_removed_slot_is_reused():
+    replica = replica_with(ORG)
+    replica.remove(3)
+    replica.upsert(6, "Flo", HIRED, "Ada", "Support")
+    assert len(replica.ids) == len(ORG)
+    assert ids(replica.direct_reports(1, "Ada")) == [2, 6]
+
+def test_subtree_keeps_each_associate_once_at_the_shallowest_depth():
+    # Both associates named Bob manage Di's team, so Di is reachable twice
+    replica = replica_with(ORG + [(6, "Gus", HIRED, "Bob", "Sales")])
+    members = replica.subtree(1, "Ada", 50)
+    assert [(member['id'], member['depth']) for member in members] == [(2, 1), (3, 1), (4, 2), (5, 2), (6, 2)]
+
+def test_subtree_stops_at_max_depth_and_on_cycles():
+    cycle = [(1, "A", HIRED, "B", "X"), (2, "B", HIRED, "A", "X")]
+    replica = replica_with(cycle)
+    assert ids(replica.subtree(1, "A", 50)) == [1, 2]
+    assert ids(replica.subtree(1, "A", 1)) == [2]
+
+def test_chain_follows_the_lowest_id_manager():
+    replica = replica_with(ORG)
+    assert ids(replica.chain(1, 4, 50)) == [4, 2, 1]
+
+def change(version, op, rows, **extra):
+    return {'op': op, 'version': version, 'rows': rows, **extra}
+
+def row(id, name, manager="Ada", department="Sales"):
+    return {'id': id, 'name': name, 'hire_date': HIRED.isoformat(), 'manager': manager, 'department': department}
+
+def test_changes_apply_in_version_order():
+    replica = replica_with(ORG)
+    replica.apply(change(2, 'INSERT', [row(7, "Hal")]))
+    replica.apply(change(3, 'DELETE', [row(2, "Bob")]))
+    replica.apply(change(3, 'INSERT', [row(8, "Ignored")]))
+    assert replica.version == 3
+    assert ids(replica.direct_reports(3, "Ada")) == [3, 7]
+
+def test_version_gap_requests_a_reload():
+    replica = replica_with(ORG)
+    reloads = []
+    replica.request_reload = lambda: reloads.append(replica.version)
+    replica.apply(change(3, 'INSERT', [row(7, "Hal")]))
+    assert reloads == [1]
+    assert 7 not in replica.slot_of
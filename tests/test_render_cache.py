@@ -0,0 +1,67 @@
+import asyncio
+from datetime import datetime, timezone
+
+import app
+from app import RenderCache
+
+def test_lru_keeps_the_most_recently_used_pages():
+    cache = RenderCache(2)
+    cache.put('a', 'A', cache.generation)
+    cache.put('b', 'B', cache.generation)
+    assert cache.get('a') == 'A'
+    cache.put('c', 'C', cache.generation)
+    assert cache.get('b') is None
+    assert cache.get('a') == 'A' and cache.get('c') == 'C'
+    assert cache.stats() == {"pages": 2, "hits": 3, "misses": 1, "invalidations": 0}
+
+def test_page_rendered_before_an_invalidation_is_not_stored():
+    cache = RenderCache(2)
+    generation = cache.generation
+    cache.invalidate()
+    cache.put('a', 'A', generation)
+    assert cache.get('a') is None
+
+def test_invalidate_drops_pages_and_version():
+    cache = RenderCache(2)
+    cache.put('a', 'A', cache.generation)
+    cache.set_version((1, None), cache.generation)
+    cache.invalidate()
+    assert cache.get('a') is None
+    assert cache.version is None
+
+def test_version_read_before_an_invalidation_is_not_kept():
+    cache = RenderCache(2)
+    generation = cache.generation
+    cache.invalidate()
+    cache.set_version((1, None), generation)
+    assert cache.version is None
+
+class VersionConnection:
+    def __init__(self, version):
+        self.version = version
+
+    async def fetchrow(self, query):
+        return {'version': self.version, 'modified_at': datetime(2024, 1, 1, tzinfo=timezone.utc)}
+
+def read_version(pinned):
+    async def scenario():
+        app.pinned_to_primary.set(pinned)
+        return await app.get_table_version()
+    return asyncio.run(scenario())
+
+def test_cached_version_answers_while_notifications_flow(monkeypatch, fake_connection):
+    monkeypatch.setattr(app, 'listener_conn', object())
+    monkeypatch.setattr(app, 'render_cache', RenderCache(2))
+    fake_connection(VersionConnection(7))
+    app.render_cache.set_version((6, None), app.render_cache.generation)
+    assert read_version(False) == (6, None)
+
+def test_client_that_just_wrote_reads_the_version_from_the_database(monkeypatch, fake_connection):
+    # Its write may have gone through another worker whose notification has
+    # not reached this one, so the cached version would be stale
+    monkeypatch.setattr(app, 'listener_conn', object())
+    monkeypatch.setattr(app, 'render_cache', RenderCache(2))
+    fake_connection(VersionConnection(7))
+    app.render_cache.set_version((6, None), app.render_cache.generation)
+    assert read_version(True)[0] == 7
+    assert app.render_cache.version == (6, None)
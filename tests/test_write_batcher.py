@@ -0,0 +1,131 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import app
+from app import BATCH_EDIT_STATEMENT, BATCH_INSERT_STATEMENT, WriteBatcher
+
+# In-memory stand-in for associates_info that understands the two batch
+# statements. Names starting with "bad" fail the statement, and a failed
+# transaction leaves the table as it was.
+class BatchConnection:
+    def __init__(self):
+        self.rows = {}
+        self.next_id = 1
+        self.statements = []
+
+    def get_server_pid(self):
+        return 1
+
+    def add_termination_listener(self, callback):
+        pass
+
+    @asynccontextmanager
+    async def transaction(self):
+        saved, next_id = {id: list(row) for id, row in self.rows.items()}, self.next_id
+        try:
+            yield
+        except Exception:
+            self.rows, self.next_id = saved, next_id
+            raise
+
+    async def fetch(self, statement, *columns):
+        self.statements.append((statement, len(columns[0])))
+        if statement == BATCH_INSERT_STATEMENT:
+            values = list(zip(*columns))
+            self.check(values)
+            ids = []
+            for row in values:
+                self.rows[self.next_id] = list(row)
+                ids.append({'id': self.next_id})
+                self.next_id += 1
+            return ids
+        assert statement == BATCH_EDIT_STATEMENT
+        edits = list(zip(*columns))
+        assert len({edit[0] for edit in edits}) == len(edits), "an UPDATE changes each row at most once"
+        self.check([edit[1:] for edit in edits])
+        updated = []
+        for id, *fields in edits:
+            if id in self.rows:
+                self.rows[id] = [new if new is not None else old for new, old in zip(fields, self.rows[id])]
+                updated.append({'id': id})
+        return updated
+
+    def check(self, rows):
+        if any(row[0] and row[0].startswith("bad") for row in rows):
+            raise ValueError("invalid row")
+
+def run_batched(conn, writes, max_rows=100):
+    async def scenario():
+        batcher = WriteBatcher(max_rows, 0.01)
+        batcher.start()
+        results = await asyncio.gather(*(write(batcher) for write in writes), return_exceptions=True)
+        await batcher.stop()
+        return results
+
+    return asyncio.run(scenario())
+
+def insert(name):
+    return lambda batcher: batcher.insert(name, None, "Manager", "Department")
+
+def edit(id, name):
+    return lambda batcher: batcher.edit(id, name, None, None, None)
+
+def test_concurrent_inserts_share_one_statement(fake_connection):
+    conn = BatchConnection()
+    fake_connection(conn)
+    assert run_batched(conn, [insert(f"Name {number}") for number in range(5)]) == [1, 2, 3, 4, 5]
+    assert conn.statements == [(BATCH_INSERT_STATEMENT, 5)]
+
+def test_batches_are_split_at_max_rows(fake_connection):
+    conn = BatchConnection()
+    fake_connection(conn)
+    run_batched(conn, [insert(f"Name {number}") for number in range(5)], max_rows=2)
+    assert [rows for _, rows in conn.statements] == [2, 2, 1]
+
+def test_statements_stay_within_the_row_change_limit(fake_connection):
+    # Larger statements would only notify a reload instead of their rows
+    conn = BatchConnection()
+    fake_connection(conn)
+    count = app.ROW_CHANGE_MAX_ROWS * 2 + 1
+    assert run_batched(conn, [insert(f"Name {number}") for number in range(count)]) == list(range(1, count + 1))
+    assert [rows for _, rows in conn.statements] == [app.ROW_CHANGE_MAX_ROWS, app.ROW_CHANGE_MAX_ROWS, 1]
+
+def test_edits_to_one_id_apply_in_queue_order(fake_connection):
+    conn = BatchConnection()
+    fake_connection(conn)
+    conn.rows[1] = ["Old", None, "Manager", "Department"]
+    assert run_batched(conn, [edit(1, "First"), edit(1, "Second"), edit(2, "Missing")]) == [1, 1, None]
+    assert conn.rows[1][0] == "Second"
+    assert conn.statements == [(BATCH_EDIT_STATEMENT, 2), (BATCH_EDIT_STATEMENT, 1)]
+
+def test_failed_batch_only_fails_the_offending_write(fake_connection):
+    conn = BatchConnection()
+    fake_connection(conn)
+    results = run_batched(conn, [insert("Good"), insert("bad row"), insert("Also good")])
+    assert results[0] == 1 and results[2] == 2
+    assert isinstance(results[1], ValueError)
+    assert [row[0] for row in conn.rows.values()] == ["Good", "Also good"]
+
+def test_connection_failure_fails_every_write_in_the_batch(monkeypatch):
+    @asynccontextmanager
+    async def unavailable(priority=None, replica=False):
+        raise ConnectionError("database unavailable")
+        yield
+
+    monkeypatch.setattr(app, 'acquire_connection', unavailable)
+    results = run_batched(None, [insert("One"), insert("Two")])
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+def test_stop_flushes_writes_already_queued(fake_connection):
+    conn = BatchConnection()
+    fake_connection(conn)
+
+    async def scenario():
+        batcher = WriteBatcher(100, 10)
+        batcher.start()
+        pending = asyncio.ensure_future(batcher.insert("Queued", None, "Manager", "Department"))
+        await asyncio.sleep(0)
+        await asyncio.wait_for(batcher.stop(), 1)
+        return await pending
+
+    assert asyncio.run(scenario()) == 1